@@ -127,7 +127,9 @@ def _timing_data_stream(path, response=None):
                         data[driver][key].append(data[driver][key][-1])
     for driver in data:
         data[driver] = pd.DataFrame(data[driver])
-        df = data[driver] if df is None else pd.concat([df, data[driver]])
+    # concatenate once; concatenating per driver would copy all previous data every time
+    if data:
+        df = pd.concat(list(data.values()))
     return df
 
 
@@ -148,6 +150,7 @@ def _timing_data_laps(path, response=None):
     td_cols = ['LastLapTime', 'PitInTime', 'PitOutTime',
                'Sector1Time', 'Sector2Time', 'Sector3Time',
                'Sector1SessionTime', 'Sector2SessionTime', 'Sector3SessionTime']
+    frames = list()
     for driver in data:
         _df = pd.DataFrame(data[driver])
         if not _df.iloc[-1][data_cols].any():
@@ -167,7 +170,10 @@ def _timing_data_laps(path, response=None):
                 _df[col] = _df[col].astype('timedelta64[ns]')
             except:
                 continue
-        df = _df if df is None else pd.concat([df, _df])
+        frames.append(_df)
+    # concatenate once; concatenating per driver would copy all previous data every time
+    if frames:
+        df = pd.concat(frames)
     return df
 
 
@@ -433,7 +433,7 @@ class Session:
         # Resample:
         # Date contains the corret time spacing information, so we use that
         # 90% of function time is spent in the next line
-        res = (mapped.resample('0.1S', on='Time').mean()
+        res = (mapped.resample('100ms', on='Time').mean()
                      .interpolate(method='linear'))
         if 'nGear' in res.columns and 'DRS' in res.columns:
             res[['nGear', 'DRS']] = res[['nGear', 'DRS']].round().astype(int)
@@ -459,7 +459,8 @@ class Session:
     def _map_objects(self, df):
         nnummap = {}
         for column in df.columns:
-            if df[column].dtype == object:
+            # object columns and dedicated string columns (default for text since pandas 3)
+            if pd.api.types.is_string_dtype(df[column].dtype):
                 backward = dict(enumerate(df[column].unique()))
                 forward = {v: k for k, v in backward.items()}
                 df[column] = df[column].map(forward)
@@ -589,7 +590,7 @@ class Session:
         stream_length = len(self.position[drivers_list[0]])
         dmap = np.empty((stream_length, len(drivers_list)), dtype=int)
 
-        fast_query = {'n_jobs': 2, 'distance_upper_bound': 500}
+        fast_query = {'workers': 2, 'distance_upper_bound': 500}
         # fast_query < Increases speed
         for index, driver in enumerate(self.position):
             trajectory = self.position[driver][['X', 'Y', 'Z']].values
@@ -601,48 +602,18 @@ class Session:
 
         """Create transform matrix to change distance point of reference
         """
-        t_matrix = np.empty((ssize, ssize))
-        for index in range(ssize):
-            rref = reference_s - reference_s[index]
-            rref[rref <= 0] = total_s + rref[rref <= 0]
-            t_matrix[index, :] = rref
+        t_matrix = _transform_matrix(reference_s, total_s)
 
         """Create mask to remove distance elements when car is on track
         """
-        time = self.position[drivers_list[0]]['Time']
-        pit_mask = np.zeros((stream_length, len(drivers_list)), dtype=bool)
-        for driver_index, driver_number in enumerate(drivers_list):
-            laps = self.laps.pick_driver_number(driver_number)
-            in_pit = True
-            times = [[], []]
-            for lap_index in laps.index:
-                lap = laps.loc[lap_index]
-                if not pd.isnull(lap['PitInTime']) and not in_pit:
-                    times[1].append(lap['PitInTime'])
-                    in_pit = True
-                if not pd.isnull(lap['PitOutTime']) and in_pit:
-                    times[0].append(lap['PitOutTime'])
-                    in_pit = False
-            if not in_pit:
-                # Car crashed, we put a time and 'Status' will take care
-                times[1].append(lap['Time'])
-            times = np.transpose(np.array(times))
-            for inout in times:
-                out_of_pit = np.logical_and(time >= inout[0], time < inout[1])
-                pit_mask[:, driver_index] |= out_of_pit
-            on_track = (self.position[driver_number]['Status'] == 'OnTrack')
-            pit_mask[:, driver_index] &= on_track.values
+        pit_mask = _pit_mask(self.laps, self.position, drivers_list)
 
         """Calculate relative distances using transform matrix
         """
         driver_ahead = {}
         stream_axis = np.arange(stream_length)
         for my_di, my_d in enumerate(drivers_list):
-            rel_distance = np.empty(np.shape(dmap))
-            for his_di, his_d in enumerate(drivers_list):
-                my_pos_i = dmap[:, my_di]
-                his_pos_i = dmap[:, his_di]
-                rel_distance[:, his_di] = t_matrix[my_pos_i, his_pos_i]
+            rel_distance = _relative_distances(t_matrix, dmap, my_di)
             his_in_pit = ~pit_mask.copy()
             his_in_pit[:, my_di] = False
             my_in_pit = ~pit_mask[:, drivers_list == my_d][:, 0]
@@ -814,3 +785,58 @@ def _log_progress(i, length, c=30):
         is_last = (p * (c+1)/c) > c
         print(f"\r[{'+'*p}{'-'*(c-p)}] ({length if is_last else i}/{length})",
               end="\n" if is_last else '')
+
+
+def _transform_matrix(reference_s, total_s):
+    """Distance from each reference point to every other reference point.
+
+    Row i holds the distance from reference point i to every other
+    reference point (forward only, wrapping around the finish line).
+    """
+    t_matrix = reference_s[np.newaxis, :] - reference_s[:, np.newaxis]
+    t_matrix[t_matrix <= 0] += total_s
+    return t_matrix
+
+
+def _pit_mask(laps, position, drivers_list):
+    """Mask which is True for all position samples at which a driver
+    is on track and not in the pit (one column per driver).
+    """
+    time = position[drivers_list[0]]['Time']
+    stream_length = len(time)
+    pit_mask = np.zeros((stream_length, len(drivers_list)), dtype=bool)
+    # split laps by driver once instead of filtering all laps per driver
+    laps_by_driver = dict(tuple(laps.groupby('DriverNumber')))
+    for driver_index, driver_number in enumerate(drivers_list):
+        drv_laps = laps_by_driver.get(str(driver_number), laps.iloc[0:0])
+        in_pit = True
+        times = [[], []]
+        # walk the columns directly; .loc would create a Series per lap
+        for pit_in, pit_out, lap_time in zip(drv_laps['PitInTime'],
+                                             drv_laps['PitOutTime'],
+                                             drv_laps['Time']):
+            if not pd.isnull(pit_in) and not in_pit:
+                times[1].append(pit_in)
+                in_pit = True
+            if not pd.isnull(pit_out) and in_pit:
+                times[0].append(pit_out)
+                in_pit = False
+        if not in_pit:
+            # Car crashed, we put a time and 'Status' will take care
+            times[1].append(lap_time)
+        times = np.transpose(np.array(times))
+        for inout in times:
+            out_of_pit = np.logical_and(time >= inout[0], time < inout[1])
+            pit_mask[:, driver_index] |= out_of_pit
+        on_track = (position[driver_number]['Status'] == 'OnTrack')
+        pit_mask[:, driver_index] &= on_track.values
+    return pit_mask
+
+
+def _relative_distances(t_matrix, dmap, driver_index):
+    """Distance from one driver to all drivers for every position sample.
+
+    The distances are looked up from the transform matrix for all samples
+    and drivers at once.
+    """
+    return t_matrix[dmap[:, [driver_index]], dmap]
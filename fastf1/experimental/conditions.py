@@ -3,8 +3,9 @@
 =========================================================
 """
 
-from fastf1.track import TrackPoint
+from fastf1.func import mad, mean, sqr_dists
 import pandas as pd
+import numpy as np
 from math import sqrt
 
 
@@ -40,49 +41,52 @@ class SectorBorderCondition(BaseCondition):
     def __init__(self, *args, **kwargs):
         super().__init__()
 
-    def _get_test_date(self, lap, drv, test_point):
-        approx_time = self.data['session_start_date'] + lap.Time
+    def _get_test_date(self, lap_time, drv, test_point):
+        approx_time = self.data['session_start_date'] + lap_time
         # now we have an approximate time for the end of the lap and we have test_x/test_y which is not unique track point
         # to get an exact time at which the car was at test_point, define a window of +-delta_t around approx_time
         delta_t = pd.to_timedelta(5, "s")
         t_start = approx_time - delta_t
         t_end = approx_time + delta_t
-        pos_range = self.data['pos'][drv].query("@t_start < Date < @t_end")
-        # search the two points in this range which are closest to test_point
-        dists_points = list()
-        for _, row in pos_range.iterrows():
-            pnt = TrackPoint(row.X, row.Y, row.Date)
-            dist = test_point.get_sqr_dist(pnt)
-            dists_points.append((dist, pnt))
 
-        dists_points.sort(key=lambda itm: itm[0])  # sort the list by first value of each tuple (distance)
+        # search the two samples in this window which are closest to test_point
+        samples = self.data['track'].get_closest_samples(drv, test_point, t_start, t_end)
+        if samples is None:
+            return None  # not enough position data in this time range
 
-        p_a = dists_points[0][1]  # closest point
-        p_b = dists_points[1][1]  # second closest point
+        p_a, p_b = samples
 
-        dist_a_b = sqrt(p_a.get_sqr_dist(p_b))
+        dist_a_b = sqrt(sqr_dists(p_b.x, p_b.y, p_a.x, p_a.y))
         if dist_a_b == 0:
             return None  # I have no idea how this is even possible, looks like an error in the data retrieved from the api
 
-        dist_test_a = sqrt(p_a.get_sqr_dist(test_point))
+        dist_test_a = sqrt(sqr_dists(test_point.x, test_point.y, p_a.x, p_a.y))
 
         # interpolate the time for test_point from those two points
         test_date = p_a.date + (p_b.date - p_a.date) * dist_test_a / dist_a_b
         return test_date
 
+    def _get_test_dates(self, drv, test_point):
+        """Get the test dates for all usable laps of a driver (see ._get_test_date()).
+
+        :return: pandas.DatetimeIndex with one date per lap; NaT if no date could be determined for a lap
+        """
+        laps = self.data['laps_by_drv'][drv]
+        return pd.DatetimeIndex([self._get_test_date(lap_time, drv, test_point) for lap_time in laps['Time']])
+
     def for_driver(self, drv, test_point):
         pass
 
     def generate_results(self, data, test_point):
         # process results
-        x_series = pd.Series(data['x'])
-        y_series = pd.Series(data['y'])
+        x_values = np.asarray(data['x'], dtype=float)
+        y_values = np.asarray(data['y'], dtype=float)
 
         result = {
-            'mean_x': x_series.mean(),
-            'mean_y': y_series.mean(),
-            'mad_x': x_series.mad(),
-            'mad_y': y_series.mad(),
+            'mean_x': mean(x_values),
+            'mean_y': mean(y_values),
+            'mad_x': mad(x_values),
+            'mad_y': mad(y_values),
             'tx': test_point.x,
             'ty': test_point.y
         }
@@ -113,51 +117,28 @@ class StartFinishCondition(SectorBorderCondition):
         :type drv: string
         :param test_point: Start/finsih line position (test) for which to calculate the condition
         :type test_point: TrackPoint
-        :return: [results x, results y] where results_* is a list of values containing the results for each lap
+        :return: {'x': results x, 'y': results y} where results_* is an array of values containing the results for each lap
         """
-        is_drv = (self.data['laps'].Driver == drv)
-        drv_last_lap = self.data['laps'][is_drv].NumberOfLaps.max()  # get the last lap of this driver
-
-        res_x = list()
-        res_y = list()
-
-        for _, lap in self.data['laps'][is_drv].iterrows():
-            # first lap, last lap, in-lap, out-lap and laps with no lap number are skipped
-            if (pd.isnull(lap.NumberOfLaps) or
-                    lap.NumberOfLaps in (1, drv_last_lap) or
-                    not pd.isnull(lap.PitInTime) or
-                    not pd.isnull(lap.PitOutTime)):
-
-                continue
+        laps = self.data['laps_by_drv'][drv]  # only usable laps; first lap, last lap, in-lap, out-lap, ... are already removed
+        test_dates = self._get_test_dates(drv, test_point)
 
-            else:
-                test_date = self._get_test_date(lap, drv, test_point)
-                if not test_date:
-                    continue
+        # calculate start dates for last laps and get positions for all of these dates at once
+        last_lap_starts = test_dates - laps['LastLapTime']
+        res_x, res_y = self.data['track'].interpolate_pos_from_times(drv, last_lap_starts)
 
-                # calculate start date for last lap and get position for that date
-                last_lap_start = test_date - lap.LastLapTime
-                lap_start_point = self.data['track'].interpolate_pos_from_time(drv, last_lap_start)
-
-                if not lap_start_point:
-                    continue  # coordinates for the given date were not valid
-
-                # add point coordinates to list of results for this pass
-                res_x.append(lap_start_point.x)
-                res_y.append(lap_start_point.y)
-
-        return {'x': res_x, 'y': res_y}
+        is_valid = ~np.isnan(res_x)  # coordinates for missing test dates or invalid coordinates are NaN
+        return {'x': res_x[is_valid], 'y': res_y[is_valid]}
 
     def generate_results(self, data, test_point):
         # process results
-        x_series = pd.Series(data['x'])
-        y_series = pd.Series(data['y'])
+        x_values = np.asarray(data['x'], dtype=float)
+        y_values = np.asarray(data['y'], dtype=float)
 
         result = {
-            'mean_x': x_series.mean(),
-            'mean_y': y_series.mean(),
-            'mad_x': x_series.mad(),
-            'mad_y': y_series.mad(),
+            'mean_x': mean(x_values),
+            'mean_y': mean(y_values),
+            'mad_x': mad(x_values),
+            'mad_y': mad(y_values),
             'tx': test_point.x,
             'ty': test_point.y
         }
@@ -185,51 +166,28 @@ class Sector23Condition(SectorBorderCondition):
         :type drv: string
         :param test_point: Start/finish line position (test) for which to calculate the condition
         :type test_point: TrackPoint
-        :return: [results x, results y] where results_* is a list of values containing the results for each lap
+        :return: {'x': results x, 'y': results y} where results_* is an array of values containing the results for each lap
         """
-        is_drv = (self.data['laps'].Driver == drv)
-        drv_last_lap = self.data['laps'][is_drv].NumberOfLaps.max()  # get the last lap of this driver
-
-        res_x = list()
-        res_y = list()
-
-        for _, lap in self.data['laps'][is_drv].iterrows():
-            # first lap, last lap, in-lap, out-lap and laps with no lap number are skipped
-            if (pd.isnull(lap.NumberOfLaps) or
-                    lap.NumberOfLaps in (1, drv_last_lap) or
-                    not pd.isnull(lap.PitInTime) or
-                    not pd.isnull(lap.PitOutTime)):
-
-                continue
+        laps = self.data['laps_by_drv'][drv]  # only usable laps; first lap, last lap, in-lap, out-lap, ... are already removed
+        test_dates = self._get_test_dates(drv, test_point)
 
-            else:
-                test_date = self._get_test_date(lap, drv, test_point)
-                if not test_date:
-                    continue
+        # calculate start dates for last sectors 3 and get positions for all of these dates at once
+        last_sector3_starts = test_dates - laps['Sector3Time']
+        res_x, res_y = self.data['track'].interpolate_pos_from_times(drv, last_sector3_starts)
 
-                # calculate start date for last sector 3 and get position for that date
-                last_sector3_start = test_date - lap.Sector3Time
-                lap_sector3_point = self.data['track'].interpolate_pos_from_time(drv, last_sector3_start)
-
-                if not lap_sector3_point:
-                    continue  # coordinates for the given date were not valid
-
-                # add point coordinates to list of results for this pass
-                res_x.append(lap_sector3_point.x)
-                res_y.append(lap_sector3_point.y)
-
-        return {'x': res_x, 'y': res_y}
+        is_valid = ~np.isnan(res_x)  # coordinates for missing test dates or invalid coordinates are NaN
+        return {'x': res_x[is_valid], 'y': res_y[is_valid]}
 
     def generate_results(self, data, test_point):
         # process results
-        x_series = pd.Series(data['x'])
-        y_series = pd.Series(data['y'])
+        x_values = np.asarray(data['x'], dtype=float)
+        y_values = np.asarray(data['y'], dtype=float)
 
         result = {
-            'mean_x': x_series.mean(),
-            'mean_y': y_series.mean(),
-            'mad_x': x_series.mad(),
-            'mad_y': y_series.mad(),
+            'mean_x': mean(x_values),
+            'mean_y': mean(y_values),
+            'mad_x': mad(x_values),
+            'mad_y': mad(y_values),
             'tx': test_point.x,
             'ty': test_point.y
         }
@@ -257,51 +215,28 @@ class Sector12Condition(SectorBorderCondition):
         :type drv: string
         :param test_point: Start/finish line position (test) for which to calculate the condition
         :type test_point: TrackPoint
-        :return: [results x, results y] where results_* is a list of values containing the results for each lap
+        :return: {'x': results x, 'y': results y} where results_* is an array of values containing the results for each lap
         """
-        is_drv = (self.data['laps'].Driver == drv)
-        drv_last_lap = self.data['laps'][is_drv].NumberOfLaps.max()  # get the last lap of this driver
-
-        res_x = list()
-        res_y = list()
-
-        for _, lap in self.data['laps'][is_drv].iterrows():
-            # first lap, last lap, in-lap, out-lap and laps with no lap number are skipped
-            if (pd.isnull(lap.NumberOfLaps) or
-                    lap.NumberOfLaps in (1, drv_last_lap) or
-                    not pd.isnull(lap.PitInTime) or
-                    not pd.isnull(lap.PitOutTime)):
-
-                continue
+        laps = self.data['laps_by_drv'][drv]  # only usable laps; first lap, last lap, in-lap, out-lap, ... are already removed
+        test_dates = self._get_test_dates(drv, test_point)
 
-            else:
-                test_date = self._get_test_date(lap, drv, test_point)
-                if not test_date:
-                    continue
+        # calculate start dates for last sectors 2 and get positions for all of these dates at once
+        last_sector2_starts = test_dates - laps['Sector3Time'] - laps['Sector2Time']
+        res_x, res_y = self.data['track'].interpolate_pos_from_times(drv, last_sector2_starts)
 
-                # calculate start date for last sector 2 and get position for that date
-                last_sector2_start = test_date - lap.Sector3Time - lap.Sector2Time
-                lap_sector2_point = self.data['track'].interpolate_pos_from_time(drv, last_sector2_start)
-
-                if not lap_sector2_point:
-                    continue  # coordinates for the given date were not valid
-
-                # add point coordinates to list of results for this pass
-                res_x.append(lap_sector2_point.x)
-                res_y.append(lap_sector2_point.y)
-
-        return {'x': res_x, 'y': res_y}
+        is_valid = ~np.isnan(res_x)  # coordinates for missing test dates or invalid coordinates are NaN
+        return {'x': res_x[is_valid], 'y': res_y[is_valid]}
 
     def generate_results(self, data, test_point):
         # process results
-        x_series = pd.Series(data['x'])
-        y_series = pd.Series(data['y'])
+        x_values = np.asarray(data['x'], dtype=float)
+        y_values = np.asarray(data['y'], dtype=float)
 
         result = {
-            'mean_x': x_series.mean(),
-            'mean_y': y_series.mean(),
-            'mad_x': x_series.mad(),
-            'mad_y': y_series.mad(),
+            'mean_x': mean(x_values),
+            'mean_y': mean(y_values),
+            'mad_x': mad(x_values),
+            'mad_y': mad(y_values),
             'tx': test_point.x,
             'ty': test_point.y
         }
@@ -329,72 +264,49 @@ class AllSectorBordersCondition(SectorBorderCondition):
         :type drv: string
         :param test_point: Start/finish line position (test) for which to calculate the condition
         :type test_point: TrackPoint
-        :return: [results x, results y] where results_* is a list of values containing the results for each lap
+        :return: {'x1': ..., 'y1': ..., 'x2': ..., 'y2': ..., 'x3': ..., 'y3': ...} with an array of results for each lap per key
         """
-        is_drv = (self.data['laps'].Driver == drv)
-        drv_last_lap = self.data['laps'][is_drv].NumberOfLaps.max()  # get the last lap of this driver
-
-        res = {'x1': list(), 'y1': list(), 'x2': list(), 'y2': list(), 'x3': list(), 'y3': list()}
-
-        for _, lap in self.data['laps'][is_drv].iterrows():
-            # first lap, last lap, in-lap, out-lap and laps with no lap number are skipped
-            if (pd.isnull(lap.NumberOfLaps) or
-                    lap.NumberOfLaps in (1, drv_last_lap) or
-                    not pd.isnull(lap.PitInTime) or
-                    not pd.isnull(lap.PitOutTime)):
-
-                continue
-
-            else:
-                test_date = self._get_test_date(lap, drv, test_point)
-                if not test_date:
-                    continue
-
-                # sector 1/2
-                last_sector2_start = test_date - lap.Sector3Time - lap.Sector2Time
-                lap_sector2_point = self.data['track'].interpolate_pos_from_time(drv, last_sector2_start)
-                # sector 2/3
-                last_sector3_start = test_date - lap.Sector3Time
-                lap_sector3_point = self.data['track'].interpolate_pos_from_time(drv, last_sector3_start)
-                # start/finish
-                last_lap_start = test_date - lap.LastLapTime
-                lap_start_point = self.data['track'].interpolate_pos_from_time(drv, last_lap_start)
-
-                if not (lap_sector2_point and lap_sector3_point and lap_start_point):
-                    continue  # coordinates for at least one of the given dates were not valid
-
-                # add point coordinates to list of results for this pass
-                res['x1'].append(lap_start_point.x)
-                res['y1'].append(lap_start_point.y)
-                res['x2'].append(lap_sector2_point.x)
-                res['y2'].append(lap_sector2_point.y)
-                res['x3'].append(lap_sector3_point.x)
-                res['y3'].append(lap_sector3_point.y)
-
-        return res
+        laps = self.data['laps_by_drv'][drv]  # only usable laps; first lap, last lap, in-lap, out-lap, ... are already removed
+        test_dates = self._get_test_dates(drv, test_point)
+        track = self.data['track']
+
+        # get positions for all laps at once
+        # sector 1/2
+        x2, y2 = track.interpolate_pos_from_times(drv, test_dates - laps['Sector3Time'] - laps['Sector2Time'])
+        # sector 2/3
+        x3, y3 = track.interpolate_pos_from_times(drv, test_dates - laps['Sector3Time'])
+        # start/finish
+        x1, y1 = track.interpolate_pos_from_times(drv, test_dates - laps['LastLapTime'])
+
+        # only use laps for which the coordinates for all of the dates are valid
+        is_valid = ~(np.isnan(x1) | np.isnan(x2) | np.isnan(x3))
+
+        return {'x1': x1[is_valid], 'y1': y1[is_valid],
+                'x2': x2[is_valid], 'y2': y2[is_valid],
+                'x3': x3[is_valid], 'y3': y3[is_valid]}
 
     def generate_results(self, data, test_point):
         # process results
-        x1_series = pd.Series(data['x1'])
-        y1_series = pd.Series(data['y1'])
-        x2_series = pd.Series(data['x2'])
-        y2_series = pd.Series(data['y2'])
-        x3_series = pd.Series(data['x3'])
-        y3_series = pd.Series(data['y3'])
+        x1_values = np.asarray(data['x1'], dtype=float)
+        y1_values = np.asarray(data['y1'], dtype=float)
+        x2_values = np.asarray(data['x2'], dtype=float)
+        y2_values = np.asarray(data['y2'], dtype=float)
+        x3_values = np.asarray(data['x3'], dtype=float)
+        y3_values = np.asarray(data['y3'], dtype=float)
 
         result = {
-            'mean_x1': x1_series.mean(),
-            'mean_y1': y1_series.mean(),
-            'mad_x1': x1_series.mad(),
-            'mad_y1': y1_series.mad(),
-            'mean_x2': x2_series.mean(),
-            'mean_y2': y2_series.mean(),
-            'mad_x2': x2_series.mad(),
-            'mad_y2': y2_series.mad(),
-            'mean_x3': x3_series.mean(),
-            'mean_y3': y3_series.mean(),
-            'mad_x3': x3_series.mad(),
-            'mad_y3': y3_series.mad(),
+            'mean_x1': mean(x1_values),
+            'mean_y1': mean(y1_values),
+            'mad_x1': mad(x1_values),
+            'mad_y1': mad(y1_values),
+            'mean_x2': mean(x2_values),
+            'mean_y2': mean(y2_values),
+            'mad_x2': mad(x2_values),
+            'mad_y2': mad(y2_values),
+            'mean_x3': mean(x3_values),
+            'mean_y3': mean(y3_values),
+            'mad_x3': mad(x3_values),
+            'mad_y3': mad(y3_values),
             'tx': test_point.x,
             'ty': test_point.y
         }
@@ -3,12 +3,12 @@
 =====================================================================================
 """
 
-from fastf1.track import Track, TrackPoint
-from fastf1.func import reject_outliers, min_index, max_index
+from fastf1.track import Track
+from fastf1.func import reject_outliers
 from matplotlib import pyplot as plt
 import pandas as pd
 import numpy as np
-from multiprocessing import Process, Manager
+from multiprocessing import Pool
 import time
 
 
@@ -76,15 +76,11 @@ class AdvancedSyncSolver:
 
         self.conditions = list()
 
-        self.manager = None
-        self.task_queue = None
-        self.result_queue = None
-        self.command_queue = None
         self.number_of_processes = processes
-        self.subprocesses = list()
 
         self.drivers = None
         self.session_start_date = None
+        self._laps_by_drv = dict()
         self.point_range = list()
 
     def setup(self):
@@ -95,6 +91,32 @@ class AdvancedSyncSolver:
         some_driver = self.drivers[0]  # TODO to be sure this should be done with multiple drivers
         self.session_start_date = self.pos[some_driver].head(1).Date.squeeze().round('min')
 
+        self._laps_by_drv = self._split_usable_laps()
+
+    def _split_usable_laps(self):
+        """Filter out all laps which are not usable and split the remaining laps by driver.
+
+        First lap, last lap, in-lap, out-lap and laps with no lap number are skipped.
+        Data of these might be unreliable or imprecise.
+
+        :return: Dictionary {driver: {column: pandas.TimedeltaIndex}} with the columns
+            'Time', 'LastLapTime', 'Sector2Time' and 'Sector3Time' for each driver
+        """
+        drv_total_laps = self.laps.groupby('Driver')['NumberOfLaps'].transform('max')  # each driver's total number of laps
+        is_usable = (self.laps['NumberOfLaps'].notna() &
+                     (self.laps['NumberOfLaps'] != 1) &
+                     (self.laps['NumberOfLaps'] != drv_total_laps) &
+                     self.laps['PitInTime'].isna() &
+                     self.laps['PitOutTime'].isna())
+
+        laps_by_drv = dict()
+        for drv in self.drivers:
+            drv_laps = self.laps[is_usable & (self.laps['Driver'] == drv)]
+            laps_by_drv[drv] = {col: pd.TimedeltaIndex(drv_laps[col])
+                                for col in ('Time', 'LastLapTime', 'Sector2Time', 'Sector3Time')}
+
+        return laps_by_drv
+
     def auto_range(self):
         """Automatically determine the range of points for the solver.
 
@@ -118,90 +140,36 @@ class AdvancedSyncSolver:
         point_b = self.track.get_closest_point(point_b)
         self.point_range = self.track.get_points_between(point_a, point_b, short=True, include_ref=True)
 
-    def _wait_for_results(self):
-        """Wait for all processes to send their results through the result queue.
-        Then results are then joined together and returned. This function blocks until all results have been received.
-        This also means that all processes are guaranteed to be in an idle state when it returns."""
-
-        idle_count = 0
-        results = dict()
-
-        while idle_count != self.number_of_processes:
-            res = self.result_queue.get()
-
-            # res is a dictionary containing {name: {key: list(), key: list(), ...}, name: ...}
-            # join all lists together per key
-            for name in res.keys():
-                # this key exists in the joined results; extend all the existing lists with the new values
-                if name in results.keys():
-                    for key in res[name].keys():
-                        results[name][key].extend(res[name][key])
-
-                # this key does not yet exist; create it
-                else:
-                    results[name] = res[name]
-
-            idle_count += 1
-
-        return results
-
-    def _queue_return_command(self):
-        """Queue as many 'return' commands as there are processes. When a process receives this commands, it will return its calculation
-        results and go into an idle state. During idle it will wait for further commands passed through the result_queue."""
-        for _ in range(self.number_of_processes):
-            self.task_queue.put('return')
-
-    def _exit_all(self):
-        """Queue as many exit commands on the command queue as there are processes."""
-        for _ in range(self.number_of_processes):
-            self.command_queue.put('exit')
-
-    def _resume_all(self):
-        """Queue as many resume commands on the command queue as there are processes."""
-        for _ in range(self.number_of_processes):
-            self.command_queue.put('resume')
-
-    def _join_all(self):
-        """Join all processes."""
-        for process in self.subprocesses:
-            process.join()
-
     def solve(self, step_size=1):
         """Main solver function which starts all the heavy processing.
 
         Before calling this function it is necessary to .setup() the solver.
         The range for the solver needs to be set and condition(s) need to be added.
 
-        This function will create the requested number of subprocesses (default: 1) and start processing the data.
+        This function will create a pool of the requested number of worker processes (default: 1) and start processing the data.
 
         :param step_size: (optional) Step size for iterating through the range of points. (default: 1)
         :type step_size: int
         """
 
-        # data which the processes need
-        shared_data = {'track': self.track,
-                       'laps': self.laps,
-                       'pos': self.pos,
+        # data which the processes need; this is pickled to each worker process once (see _init_worker)
+        # the full lap frame is not passed, the conditions only use the usable laps per driver
+        # the track is passed without its position data frames, only the position arrays per driver are kept
+        shared_data = {'track': self.track._copy_without_pos_data(self.drivers),
+                       'laps_by_drv': self._laps_by_drv,
                        'session_start_date': self.session_start_date}
 
         for cond in self.conditions:
             cond.set_data(shared_data)
 
-        # each condition needs to be calculated for each driver
-        # create a queue and populate it with (condition, driver) pairs
-        self.manager = Manager()
-        self.task_queue = self.manager.Queue()  # main -> subprocess: holds all tasks and the commands for returning the results
-        self.result_queue = self.manager.Queue()  # subprocess -> main: return results
-        self.command_queue = self.manager.Queue()  # main -> subprocess: processes block on this queue while idle waiting for a command
-
-        self.subprocesses = list()
+        test_points = self.point_range[0::step_size]
 
-        print("Starting processes...")
-        # create and start the processes
-        for _ in range(self.number_of_processes):
-            p = SolverSubprocess(self.task_queue, self.result_queue, self.command_queue, self.conditions)
-            p.start()
-            self.subprocesses.append(p)
+        # Create tasks: one task consists of a condition and a test point. The condition is calculated for all drivers in one task.
+        # Only pass the index for a condition because sending whole classes to the processes with each task is inefficient.
+        # The list of conditions is passed to each process once when it is started.
+        tasks = [(c_index, p_index, test_point)
+                 for p_index, test_point in enumerate(test_points)
+                 for c_index in range(len(self.conditions))]
 
         for condition in self.conditions:
             self.results[condition.name] = dict()
@@ -210,49 +178,42 @@ class AdvancedSyncSolver:
         start_time = time.time()  # start time for measuring _run time
 
         cnt = 0
-        print("total: {} | step size: {} | processing: {}".format(len(self.point_range), step_size, int(len(self.point_range) / step_size)))
-        for test_point in self.point_range[0::step_size]:
-            cnt += 1
-            print(cnt)  # simplified progress report
-
-            # Create tasks: one task consists of a condition, driver and test point
-            # Do one calculation _run per test point. The results for this point are then collected and the next _run for teh next point is done.
-            # Per calculation _run 'number of conditions' * 'number of drivers' = 'number of tasks'
-
-            for condition in self.conditions:
-                for driver in self.drivers:
-                    # the list of conditions is passed to the process when it is created; only pass the index for a condition because sending whole
-                    # classes through the queue is inefficient
-                    c_index = self.conditions.index(condition)
-                    self.task_queue.put((c_index, driver, test_point))
-                    # each process can now fetch an item from the queue and calculate the condition for the specified driver
-
-            # add return commands to task queue so that all processes will return their results and go to idle when the end of the queue is reached
-            self._queue_return_command()
-            # wait until all processes have finished processing the tasks and have returned their results
-            res = self._wait_for_results()
-
-            for condition in self.conditions:
-                c_index = self.conditions.index(condition)
-
-                proc_res = condition.generate_results(res[c_index], test_point)
-
-                for key in proc_res.keys():
-                    if key in self.results[condition.name].keys():
-                        self.results[condition.name][key].append(proc_res[key])
-                    else:
-                        self.results[condition.name][key] = [proc_res[key], ]
-
-            self._resume_all()  # send a resume command to all processes; they will block on the empty task queue until task are added
+        print("total: {} | step size: {} | processing: {}".format(len(self.point_range), step_size, len(test_points)))
+        # send tasks to the workers in chunks instead of one by one; this saves one round trip between processes per task
+        # while still leaving about four chunks per worker for balancing the load
+        chunksize = max(1, len(tasks) // (4 * self.number_of_processes))
+        with Pool(self.number_of_processes, initializer=_init_worker, initargs=(self.conditions, self.drivers)) as pool:
+            # all tasks are independent of each other; workers never need to wait for each other between test points
+            for c_index, p_index, proc_res in pool.imap_unordered(_solve_task, tasks, chunksize=chunksize):
+                # tasks are finished in arbitrary order; write each result to the index of its test point
+                self._store_result(self.results[self.conditions[c_index].name], p_index, proc_res, len(test_points))
+                cnt += 1
+                print(cnt)  # simplified progress report
 
         # all tasks have been calculated
         print('Finished')
         print('Took:', time.time() - start_time)
 
-        self._queue_return_command()  # queue a return command; processes currently only take exit commands while in idle state
-        self._wait_for_results()  # wait for the processes to go to idle state
-        self._exit_all()  # send exit command to all processes
-        self._join_all()  # wait for all processes to actually exit
+    @staticmethod
+    def _store_result(results, index, proc_res, length):
+        """Write the results of one test point into the result arrays of a condition.
+
+        The arrays are preallocated with the total number of test points when the first result is stored.
+        Entries for test points which have not been calculated (yet) are NaN.
+
+        :param results: Dictionary of result arrays for one condition
+        :type results: dict
+        :param index: Index of the test point
+        :type index: int
+        :param proc_res: Results for this test point as returned by the condition's .generate_results()
+        :type proc_res: dict
+        :param length: Total number of test points
+        :type length: int
+        """
+        for key, value in proc_res.items():
+            if key not in results:
+                results[key] = np.full(length, np.nan)
+            results[key][index] = value
 
     def solve_one_condition_single_process(self):
         """Alternative way for solving the condition (usage not recommended!)
@@ -265,8 +226,7 @@ class AdvancedSyncSolver:
 
         # data which the processes need
         shared_data = {'track': self.track,
-                       'laps': self.laps,
-                       'pos': self.pos,
+                       'laps_by_drv': self._laps_by_drv,
                        'session_start_date': self.session_start_date}
 
         self.conditions[0].set_data(shared_data)
@@ -278,27 +238,15 @@ class AdvancedSyncSolver:
 
         cnt = 0
         print(len(self.point_range))
-        for test_point in self.point_range:
+        for p_index, test_point in enumerate(self.point_range):
             cnt += 1
             print(cnt)  # simplified progress report
 
-            values = dict()
-            for driver in self.drivers:
-                data = self.conditions[0].for_driver(driver, test_point)
-                if not values:
-                    values = data
-                else:
-                    for key in data.keys():
-                        values[key].extend(data[key])
+            values = _join_driver_results(self.conditions[0], self.drivers, test_point)
 
             proc_res = self.conditions[0].generate_results(values, test_point)
 
-            name = self.conditions[0].name
-            for key in proc_res.keys():
-                if key in self.results.keys():
-                    self.results[key].append(proc_res[key])
-                else:
-                    self.results[key] = [proc_res[key], ]
+            self._store_result(self.results, p_index, proc_res, len(self.point_range))
 
         # all tasks have been calculated
         print('Finished')
@@ -324,54 +272,33 @@ class AdvancedSyncSolver:
         # positions in plural; the preliminary synchronization is not perfect
         x_coords = list()
         y_coords = list()
-        usable_laps = 0  # for logging purpose
 
         for drv in self.drivers:
-            is_drv = (self.laps.Driver == drv)  # create a list of booleans for filtering laps_data by current driver
-            drv_total_laps = self.laps[is_drv].NumberOfLaps.max()  # get the current drivers total number of laps in this session
+            # start of the session plus time at which the lap was registered (approximately end of lap)
+            approx_lap_end_dates = self.session_start_date + self._laps_by_drv[drv]['Time']
 
-            for _, lap in self.laps[is_drv].iterrows():
-                # first lap, last lap, in-lap, out-lap and laps with no lap number are skipped
-                # data of these might be unreliable or imprecise
-                if (pd.isnull(lap.NumberOfLaps) or
-                        lap.NumberOfLaps in (1, drv_total_laps) or
-                        not pd.isnull(lap.PitInTime) or
-                        not pd.isnull(lap.PitOutTime)):
+            end_x, end_y = self.track.interpolate_pos_from_times(drv, approx_lap_end_dates)
+            is_valid = ~np.isnan(end_x)  # coordinates for some dates may not be valid
+            x_coords.append(end_x[is_valid])
+            y_coords.append(end_y[is_valid])
 
-                    continue
-
-                else:
-                    # start of the session plus time at which the lap was registered (approximately end of lap)
-                    approx_lap_end_date = self.session_start_date + lap.Time
-
-                    end_pnt = self.track.interpolate_pos_from_time(drv, approx_lap_end_date)
-                    if not end_pnt:
-                        continue  # coordinates for the given date were not valid
-
-                    x_coords.append(end_pnt.x)
-                    y_coords.append(end_pnt.y)
-
-                    usable_laps += 1
+        x_coords = np.concatenate(x_coords)
+        y_coords = np.concatenate(y_coords)
+        usable_laps = len(x_coords)  # for logging purpose
 
         print("{} usable laps".format(usable_laps))
 
         # there will still be some outliers; it's only very few though
         # so... statistics to the rescue then but allow for very high deviation as we want a long range of possible points for now
         # we only want to sort out the really far away stuff
-        x_coords = np.array(x_coords)
-        y_coords = np.array(y_coords)
         x_coords, y_coords = reject_outliers(x_coords, y_coords, m=100.0)  # m defines the threshold for outliers; very high here
         print("Rejected {} outliers".format(usable_laps - len(x_coords)))
 
-        points = list()
-        index_on_track = list()
-        for x, y in zip(x_coords, y_coords):
-            point = self.track.get_closest_point(TrackPoint(x, y))
-            points.append(point)
-            index_on_track.append(self.track.sorted_points.index(point))
+        # map all coordinates onto the track at once
+        index_on_track = self.track.get_closest_points(x_coords, y_coords)
 
-        point_a = points[min_index(index_on_track)]
-        point_b = points[max_index(index_on_track)]
+        point_a = self.track.sorted_points[index_on_track.min()]
+        point_b = self.track.sorted_points[index_on_track.max()]
 
         point_range = self.track.get_points_between(point_a, point_b, short=True, include_ref=True)
 
@@ -380,80 +307,57 @@ class AdvancedSyncSolver:
         return point_range
 
 
-class SolverSubprocess:
-    """This class represents a single subprocess/worker.
-    It will store all calculation results until the main process request them. The results will then be send
-    trough a queue to the main process. The main process will join all results from all subprocesses."""
-    def __init__(self, task_queue, result_queue, command_queue, conditions):
-        """Initiate the subprocess.
-
-        :param task_queue: main -> subprocess: tasks and command for returning data
-        :type task_queue: multiprocessing.Queue
-        :param result_queue: subprocess -> main: return calculation results
-        :type result_queue: multiprocessing.Queue
-        :param command_queue: main -> subprocess: commands for resume or exit; process will block on this queue while idling
-        :type command_queue: multiprocessing.Queue
-        :param conditions: List of all conditions added to the solver. Each task will contain an index which references a condition from this list.
-        :type conditions: list
-        """
-        # use a dictionary to hold all results from processed conditions
-        # multiple processes can process the same condition for different drivers simultaneously
-        # therefore it is not safe to immediately save the results in the condition class
-        # instead, the subprocess collects all results from the calculations from one _run (one iteration)
-        # they are stored in the dictionary and teh condition's index is used as a key
-        # when all subprocesses are finished, the results are collected and the conditions are updated
-        self._task_queue = task_queue
-        self._result_queue = result_queue
-        self._command_queue = command_queue
-        self._conditions = conditions
-        self._results = dict()
-
-        self._process = Process(target=self._run)
-
-    def start(self):
-        """Start the process. Wraps multiprocessing.Process.start"""
-        self._process.start()
-
-    def join(self):
-        """Wait for this process to join. Wraps multiprocessing.Process.join"""
-        self._process.join()
-
-    def _add_result(self, name, data):
-        """Add a single calculation result."""
-        if name not in self._results.keys():
-            self._results[name] = data
-        else:
-            for key in data.keys():
-                self._results[name][key].extend(data[key])
-
-    def _run(self):
-        """This is the main function which will loop for the lifetime of the process.
-        It receives tasks and commands from the main process and calculates the results."""
-
-        while True:
-            task = self._task_queue.get()
-
-            if task == 'return':
-                # print('Going into idle', self)
-                # return the calculation results and wait for commands ("idle")
-                self._result_queue.put(self._results)
-                self._results = dict()  # delete all results after they have been returned
-
-                cmd = self._command_queue.get()
-                if cmd == 'exit':
-                    print("Exiting", self)
-                    return
-
-                elif cmd == 'resume':
-                    # print("Resuming", self)
-                    continue
-
-            # print('New task', self)
-
-            # process the received task
-            # a task consists of a condition which is to be calculated, a driver to calculate if for and a test point for
-            # a probable start/finish line position
-            c_index, drv, point = task
-            condition = self._conditions[c_index]  # get the condition from its index
-            res = condition.for_driver(drv, point)  # calculate the condition and store the results
-            self._add_result(c_index, res)
+# conditions and drivers for the worker processes of the solver; set once per process by _init_worker
+_worker_conditions = None
+_worker_drivers = None
+
+
+def _init_worker(conditions, drivers):
+    """Initialize a worker process of the solver pool.
+
+    :param conditions: List of all conditions added to the solver. Each task will contain an index which references a condition from this list.
+    :type conditions: list
+    :param drivers: List of all drivers for which the conditions are calculated
+    :type drivers: list
+    """
+    global _worker_conditions, _worker_drivers
+    _worker_conditions = conditions
+    _worker_drivers = drivers
+
+
+def _solve_task(task):
+    """Calculate a single task in a worker process.
+
+    A task consists of a condition which is to be calculated and a test point for a probable start/finish line position.
+    The condition is calculated for all drivers and the joined results are processed by the condition.
+
+    :param task: (condition index, test point index, test point)
+    :type task: tuple
+    :return: (condition index, test point index, processed results)
+    """
+    c_index, p_index, point = task
+    condition = _worker_conditions[c_index]  # get the condition from its index
+
+    values = _join_driver_results(condition, _worker_drivers, point)
+
+    return c_index, p_index, condition.generate_results(values, point)
+
+
+def _join_driver_results(condition, drivers, point):
+    """Calculate a condition for all drivers and join the results.
+
+    :param condition: The condition which is to be calculated
+    :type condition: BaseCondition
+    :param drivers: List of all drivers for which the condition is calculated
+    :type drivers: list
+    :param point: Test point for a probable start/finish line position
+    :type point: TrackPoint
+    :return: Dictionary with one array per result key containing the results of all drivers
+    """
+    values = dict()
+    for drv in drivers:
+        for key, res in condition.for_driver(drv, point).items():
+            values.setdefault(key, list()).append(res)
+
+    # concatenate once; extending per driver would copy the previous results every time
+    return {key: np.concatenate(res) for key, res in values.items()}
@@ -9,17 +9,72 @@ import numpy as np
 def min_index(_iterable):
     """Return the index of the minimum value in an iterable
 
-    :param _iterable: any iterable
+    The index of the first occurrence is returned if the minimum value occurs multiple times.
+
+    :param _iterable: list or numpy array of numeric values
     """
-    return _iterable.index(min(_iterable))
+    return int(np.argmin(_iterable))  # single pass; list.index(min(...)) needs two
 
 
 def max_index(_iterable):
     """Return the index of the maximum value in an iterable
 
-    :param _iterable: any iterable
+    The index of the first occurrence is returned if the maximum value occurs multiple times.
+
+    :param _iterable: list or numpy array of numeric values
+    """
+    return int(np.argmax(_iterable))  # single pass; list.index(max(...)) needs two
+
+
+def sqr_dists(xs, ys, x, y):
+    """Calculate the squared euclidean distance between one or multiple points and a reference point.
+
+    Works with scalars as well as with numpy arrays. Comparing squared distances gives the same result as comparing
+    the distances themselves while saving the square root.
+
+    :param xs: x coordinate(s)
+    :type xs: int, float or numpy.ndarray
+    :param ys: y coordinate(s)
+    :type ys: int, float or numpy.ndarray
+    :param x: x coordinate of the reference point
+    :type x: int or float
+    :param y: y coordinate of the reference point
+    :type y: int or float
+    :return: squared distance(s), same shape as xs and ys
+    """
+    dx = xs - x
+    dy = ys - y
+    return dx * dx + dy * dy
+
+
+def mean(data):
+    """Calculate the arithmetic mean of an array.
+
+    Unlike numpy.mean this does not warn for an empty array.
+
+    :param data: array of values
+    :type data: numpy.array or list
+    :return: the mean (NaN if data is empty)
     """
-    return _iterable.index(max(_iterable))
+    data = np.asarray(data, dtype=float)
+    if not len(data):
+        return np.nan
+    return data.mean()
+
+
+def mad(data):
+    """Calculate the mean absolute deviation of an array.
+
+    Equivalent to pandas.Series.mad but without the overhead of creating a Series first.
+
+    :param data: array of values
+    :type data: numpy.array or list
+    :return: the mean absolute deviation (NaN if data is empty)
+    """
+    data = np.asarray(data, dtype=float)
+    if not len(data):
+        return np.nan
+    return np.abs(data - data.mean()).mean()
 
 
 def reject_outliers(data, *secondary, m=2.):
@@ -40,10 +95,7 @@ def reject_outliers(data, *secondary, m=2.):
     """
     d = np.abs(data - np.median(data))
     mdev = np.median(d)
-    s = d/mdev if mdev else 0.
-
-    ret_secondary = list()
-    for i in range(len(secondary)):
-        ret_secondary.append(secondary[i][s < m])
+    # mask of values to keep; all values are kept if there is no deviation at all
+    mask = d < m * mdev if mdev else np.ones(len(data), dtype=bool)
 
-    return data[s < m], *ret_secondary
+    return (data[mask], *(arr[mask] for arr in secondary))
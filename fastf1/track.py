@@ -3,10 +3,13 @@
 ==================================
 """
 
-from fastf1.func import min_index
+from fastf1.func import sqr_dists
 from matplotlib import pyplot as plt
 import pandas as pd
-from math import sqrt
+import numpy as np
+from scipy import spatial
+from scipy.spatial import distance
+import copy
 
 """
 Distinction between "Time" and "Date":
@@ -27,12 +30,15 @@ class TrackPoint:
     """Simple point class.
 
     A point has an x and y coordinate and an optional date.
-    A function for calculating the square of the distance to another point is also provided.
+    Use fastf1.func.sqr_dists for calculating the (squared) distance between points.
 
     For convenience reasons point.x and point.y can also be accessed as point['x'] and point['y'] (get only).
     Only use this implementation when necessary because it lacks clarity. It's not quite obvious then that poitn is a
     separate class (could be a dictionary for example)
     """
+    # thousands of points are created per track; slots avoid a per instance __dict__ and speed up attribute access
+    __slots__ = ('x', 'y', 'date')
+
     def __init__(self, x, y, date=None):
         """
         :param x: x coordinate
@@ -53,15 +59,96 @@ class TrackPoint:
         else:
             raise KeyError
 
-    def get_sqr_dist(self, other):
-        """Calculate the square of the distance to another point.
+    def __getstate__(self):
+        return {'x': self.x, 'y': self.y, 'date': self.date}
+
+    def __setstate__(self, state):
+        # the state is a plain dict like it was before slots were used so that old pickles can still be loaded
+        self.x = state['x']
+        self.y = state['y']
+        self.date = state.get('date')
+
+
+def _greedy_sort(xs, ys, max_dist, callback=None):
+    """Sort points by always choosing the next closest point (nearest neighbour traversal).
+
+    The first point is used as starting point. The next closest point is looked up using a KD-tree. Points which are
+    already sorted are not removed from the tree immediately. Instead they are skipped when querying and the tree is
+    rebuilt from the remaining points only when a large part of it consists of already sorted points.
+
+    :param xs: x coordinates of all points
+    :type xs: numpy.ndarray
+    :param ys: y coordinates of all points
+    :type ys: numpy.ndarray
+    :param max_dist: If the next closest point is further away than this (euclidean distance), the current point is
+        considered an outlier.
+    :type max_dist: int or float
+    :param callback: (optional) Function which is called before each step with the list of sorted indices and the
+        boolean mask of unsorted points as arguments.
+    :return: indices of sorted points (in sorted order), indices of excluded points
+    """
+    xy = np.column_stack((xs, ys))
 
-        :param other: Another point
-        :type other: TrackPoint
-        :return: distance^2
-        """
-        dist = abs(other.x - self.x) + abs(other.y - self.y)
-        return dist
+    is_unsorted = np.ones(len(xy), dtype=bool)  # mask of all points which have not been sorted yet
+    sorted_idx = list()
+    excluded_idx = list()
+
+    tree_idx = np.arange(len(xy))  # maps the indices of points in the tree to indices of all points
+    tree = spatial.cKDTree(xy)
+    dead_in_tree = 0  # number of already sorted points which are still in the tree
+
+    # Get the first point as a starting point. Any point could be used as starting point. Later the next closest point is used as next point.
+    next_idx = 0
+    is_unsorted[next_idx] = False
+    dead_in_tree += 1
+
+    for _ in range(len(xy) - 1):
+        if callback:
+            callback(sorted_idx, is_unsorted)
+
+        # get the next closest point which is not sorted yet and its distance to the current point
+        # query an increasing number of neighbours until at least one unsorted point is found
+        k = 8
+        while True:
+            k = min(k, len(tree_idx))
+            distances, candidates = tree.query(xy[next_idx], k=k)  # euclidean distances
+            distances = np.atleast_1d(distances)
+            candidates = tree_idx[np.atleast_1d(candidates)]
+            is_candidate = is_unsorted[candidates]
+            if is_candidate.any():
+                break
+            k *= 2
+
+        i = int(is_candidate.argmax())  # results are sorted by distance; first unsorted point is the closest one
+        index_min = candidates[i]
+        min_dst = distances[i]
+
+        # Check if the closest point is within a reasonable distance. There are some outliers which are very clearly not on track.
+        # If the next point has no other point within a reasonable distance, it is considered an outlier and removed.
+        if min_dst > max_dist:
+            excluded_idx.append(next_idx)
+        else:
+            sorted_idx.append(next_idx)
+
+        # Get a new next point. The new point is the one which was closest to the last one.
+        next_idx = index_min
+        is_unsorted[next_idx] = False
+        dead_in_tree += 1
+
+        # rebuild the tree from the unsorted points only if too many sorted points need to be skipped
+        if dead_in_tree > 0.4 * len(tree_idx) and is_unsorted.any():
+            tree_idx = np.flatnonzero(is_unsorted)
+            tree = spatial.cKDTree(xy[tree_idx])
+            dead_in_tree = 0
+
+    # append the last point if it is not an outlier
+    last_idx = sorted_idx[-1]
+    if sqr_dists(xs[next_idx], ys[next_idx], xs[last_idx], ys[last_idx]) <= max_dist ** 2:
+        sorted_idx.append(next_idx)
+    else:
+        excluded_idx.append(next_idx)
+
+    return np.array(sorted_idx, dtype=int), np.array(excluded_idx, dtype=int)
 
 
 class Track:
@@ -103,17 +190,22 @@ class Track:
         self.sorted_points = list()
         self.excluded_points = list()
 
-        self.sorted_x = list()  # list of sorted coordinates for easy plotting and lazy coordinate validation
-        self.sorted_y = list()
+        # coordinates of all unique points as separate arrays (same order as unsorted_points)
+        # all heavy calculations are done on these arrays instead of on the point objects
+        self._xs = np.empty(0)
+        self._ys = np.empty(0)
+
+        self.sorted_x = np.empty(0)  # arrays of sorted coordinates for easy plotting and lazy coordinate validation
+        self.sorted_y = np.empty(0)  # (updated automatically when sorted_points is set)
 
         self.finish_line = None
 
-        self.distances = list()
-        self.distances_normalized = list()
+        self.distances = np.empty(0)
+        self.distances_normalized = np.empty(0)
 
         self.track = None
 
-        self._next_point = None
+        self._pos_arrays = dict()  # cache for position data as arrays per driver; see ._get_pos_arrays()
 
         self._vis_freq = 0
         self._vis_counter = 0
@@ -122,28 +214,61 @@ class Track:
         # extract point from position data frame
         self._unsorted_points_from_pos_data()
 
-    def _unsorted_points_from_pos_data(self):
-        """Extract all unique track points from the position data."""
-        # get all driver numbers
-        drivers = list(self._pos_data.keys())
+    @property
+    def sorted_points(self):
+        """List of all unique track points in sorted order.
 
-        # create a combined data frame with all column names but without data; use the data of the first driver to get the column names
-        combined = pd.DataFrame(columns=[*self._pos_data[drivers[0]].columns])
+        The arrays of sorted coordinates (sorted_x, sorted_y) are updated whenever a new list is assigned.
+        Therefore always assign a new list instead of modifying the list in place.
+        """
+        return self._sorted_points
+
+    @sorted_points.setter
+    def sorted_points(self, points):
+        self._sorted_points = points
+        self.sorted_x = np.array([point.x for point in points], dtype='float64')
+        self.sorted_y = np.array([point.y for point in points], dtype='float64')
+        # sets of all coordinates for constant time membership checks
+        self._sorted_x_set = set(self.sorted_x.tolist())
+        self._sorted_y_set = set(self.sorted_y.tolist())
+        # index of each point in the list of sorted points by coordinates (unique points are unique by coordinates)
+        # object ids can not be used as keys because they do not survive pickling
+        self._sorted_index = {xy: i for i, xy in enumerate(zip(self.sorted_x.tolist(), self.sorted_y.tolist()))}
+        # the cached position arrays contain a track point mask which depends on the sorted points
+        self._pos_arrays = dict()
+
+    def __setstate__(self, state):
+        state = dict(state)
+        # tracks pickled by older versions store the sorted points directly and have none of the attributes
+        # which are derived from the points; these need to be rebuilt
+        old_sorted_points = state.pop('sorted_points', None)
+        state.pop('_next_point', None)  # no longer used
+        self.__dict__.update(state)
+
+        if old_sorted_points is not None:
+            self._xs = np.array([point.x for point in self.unsorted_points], dtype='float64')
+            self._ys = np.array([point.y for point in self.unsorted_points], dtype='float64')
+            self.distances = np.asarray(self.distances, dtype='float64')
+            self.distances_normalized = np.asarray(self.distances_normalized, dtype='float64')
+            self.sorted_points = old_sorted_points  # rebuilds the coordinate arrays, index and cache
 
-        # add the data of all drivers
-        for n in drivers:
-            combined = combined.append(self._pos_data[n])
+    def _unsorted_points_from_pos_data(self):
+        """Extract all unique track points from the position data."""
+        # combine the data of all drivers in a single step; appending driver by driver would copy the data every time
+        combined = pd.concat(list(self._pos_data.values()), ignore_index=True)
 
         # filter out data points where the car is not on track
-        is_on_track = combined['Status'] == 'OnTrack'
-        combined = combined[is_on_track]
+        is_on_track = combined['Status'].values == 'OnTrack'
 
         # filter out anything but X and Y coordinates and drop duplicate values
-        no_dupl_combined = combined.filter(items=('X', 'Y')).drop_duplicates()
+        xy = combined.loc[is_on_track, ['X', 'Y']].to_numpy()
+        xy = np.unique(xy, axis=0).astype('float64')
+
+        self._xs = xy[:, 0]
+        self._ys = xy[:, 1]
 
         # create a point object for each point
-        for index, data in no_dupl_combined.iterrows():
-            self.unsorted_points.append(TrackPoint(data['X'], data['Y']))
+        self.unsorted_points = [TrackPoint(x, y) for x, y in xy]
 
     def _init_viusualization(self):
         """Initiate the plot for visualizing the progress of sorting the track points."""
@@ -163,11 +288,16 @@ class Track:
             plt.clf()
             self._fig = None
 
-    def _visualize_sorting_progress(self):
+    def _visualize_sorting_progress(self, sorted_idx, is_unsorted):
         """Visualize the current progress of sorting of the track points.
 
         Updates the plot with the current data. The plot is created first if this is
         the first call to this function.
+
+        :param sorted_idx: indices of all points which have been sorted so far (in sorted order)
+        :type sorted_idx: list
+        :param is_unsorted: boolean mask which is True for all points which have not been sorted yet
+        :type is_unsorted: numpy.ndarray
         """
         if not self._vis_freq:
             return  # don't do visualization if _vis_freq is zero
@@ -178,22 +308,9 @@ class Track:
         self._vis_counter += 1
 
         if self._vis_counter % self._vis_freq == 0:
-            # visualize current state
-            xvals_sorted = list()
-            yvals_sorted = list()
-            for point in self.sorted_points:
-                xvals_sorted.append(point.x)
-                yvals_sorted.append(point.y)
-
-            xvals_unsorted = list()
-            yvals_unsorted = list()
-            for point in self.unsorted_points:
-                xvals_unsorted.append(point.x)
-                yvals_unsorted.append(point.y)
-
-            # update plot
-            self._line1.set_data(xvals_sorted, yvals_sorted)  # set plot data
-            self._line2.set_data(xvals_unsorted, yvals_unsorted)  # set plot data
+            # visualize current state and update plot
+            self._line1.set_data(self._xs[sorted_idx], self._ys[sorted_idx])  # set plot data
+            self._line2.set_data(self._xs[is_unsorted], self._ys[is_unsorted])  # set plot data
             self._ax.relim()  # recompute the data limits
             self._ax.autoscale_view()  # automatic axis scaling
             self._fig.canvas.draw()
@@ -202,18 +319,12 @@ class Track:
     def _integrate_distance(self):
         """Integrate distance over all points and save distance from start/finish line for each point."""
         # TODO this is currently not implemented; need start/finish line position and direction. Maybe then save results per point in point object
-        self.distances.append(0)  # distance is obviously zero at the starting point
-
-        distance_covered = 0  # distance since first point
-
-        for i in range(1, len(self.sorted_points)):
-            # calculate the length of the segment between the last and the current point
-            segment_length = sqrt(self.sorted_points[i-1].get_sqr_dist(self.sorted_points[i]))
-            distance_covered += segment_length
-            self.distances.append(distance_covered)
+        # length of the segments between each two consecutive points
+        segment_lengths = np.hypot(np.diff(self.sorted_x), np.diff(self.sorted_y))
 
-        for dist in self.distances:
-            self.distances_normalized.append(dist / self.distances[-1])
+        # distance is obviously zero at the starting point
+        self.distances = np.concatenate(([0], np.cumsum(segment_lengths)))
+        self.distances_normalized = self.distances / self.distances[-1]
 
     def _determine_track_direction(self):
         """Check if the track direction is correct and if not reverse the list of sorted points to correct it.
@@ -238,11 +349,8 @@ class Track:
                 n += 1  # driver wasn't on track very long apparently; try the next driver
                 continue
 
-            point1 = self.get_closest_point(TrackPoint(p1.X, p1.Y))  # the resulting point will have the same coordinates but the exact instance
-            point2 = self.get_closest_point(TrackPoint(p2.X, p2.Y))  # is required to get its index in the next step
-
-            idx1 = self.sorted_points.index(point1)
-            idx2 = self.sorted_points.index(point2)
+            # indices of the unique track points for both samples (the coordinates are the same as the samples' coordinates)
+            idx1, idx2 = self.get_closest_points(np.array([p1.X, p2.X]), np.array([p1.Y, p2.Y]))
 
             if idx1 > idx2 and not (idx1 - idx2) > 0.9 * len(self.sorted_points):
                 # first part of this check: The point with the higher index is the one which is later in the lap. This should be the second point.
@@ -250,44 +358,18 @@ class Track:
                 # second part: The exception is, if the list divides the track between these two points. In this case the first point would have
                 #               a higher index because it right at the end of the list while the second point is at the beginning. In case that
                 #               more than 90% of the list are between these two points this edge case is assumed. The list will not be reversed.
-                self.sorted_points.reverse()
+                self.sorted_points = self.sorted_points[::-1]
 
             break
 
     def _sort_points(self):
         """Does the actual sorting of points."""
-        # Get the first point as a starting point. Any point could be used as starting point. Later the next closest point is used as next point.
-        self._next_point = self.unsorted_points.pop(0)
-
-        while self.unsorted_points:
-            self._visualize_sorting_progress()
-
-            # calculate all distances between the next point and all other points
-            distances = list()
-            for pnt in self.unsorted_points:
-                distances.append(self._next_point.get_sqr_dist(pnt))
-
-            # get the next closest point and its index
-            min_dst = min(distances)
-            index_min = distances.index(min_dst)
-
-            # Check if the closest point is within a reasonable distance. There are some outliers which are very clearly not on track.
-            # The limit value was determined experimentally. Usually the distance between to points is approx. 100.
-            # (This is the square of the distance. Not the distance itself.)
-            # If the _next_point has no other point within a reasonable distance, it is considered an outlier and removed.
-            if min_dst > 200:
-                self.excluded_points.append(self._next_point)
-            else:
-                self.sorted_points.append(self._next_point)
-
-            # Get a new _next_point. The new point is the one which was closest to the last one.
-            self._next_point = self.unsorted_points.pop(index_min)
+        # The limit value for outliers was determined experimentally. Usually the distance between to points is approx. 100.
+        sorted_idx, excluded_idx = _greedy_sort(self._xs, self._ys, 200, callback=self._visualize_sorting_progress)
 
-        # append the last point if it is not an outlier
-        if self._next_point.get_sqr_dist(self.sorted_points[-1]) <= 200:
-            self.sorted_points.append(self._next_point)
-        else:
-            self.excluded_points.append(self._next_point)
+        self.sorted_points = [self.unsorted_points[i] for i in sorted_idx]
+        self.excluded_points = [self.unsorted_points[i] for i in excluded_idx]
+        self.unsorted_points = list()
 
         self._cleanup_visualization()
 
@@ -321,17 +403,18 @@ class Track:
         session_start_date = self._pos_data[some_driver].head(1).Date.squeeze().round('min')
 
         dates = list()
-        for _, lap in laps_data.iterrows():
-            approx_lap_end_date = session_start_date + lap.Time
+        # iterate over plain column values; iterrows would construct a Series for every lap
+        for lap_time, driver in zip(laps_data['Time'], laps_data['Driver']):
+            approx_lap_end_date = session_start_date + lap_time
 
             range_start = approx_lap_end_date - pd.Timedelta(10, "s")
             range_end = approx_lap_end_date + pd.Timedelta(10, "s")
 
-            if type(lap.Driver) != str:
+            if type(driver) != str:
                 dates.append(None)
                 continue
 
-            date = self.get_time_from_pos(lap.Driver, self.finish_line, range_start, range_end)
+            date = self.get_time_from_pos(driver, self.finish_line, range_start, range_end)
             dates.append(date)
 
         # create a copy of the data frame because insert works inplace and I think that's not intuitive here
@@ -355,10 +438,6 @@ class Track:
         self._sort_points()
         self._determine_track_direction()
 
-        for point in self.sorted_points:
-            self.sorted_x.append(point.x)
-            self.sorted_y.append(point.y)
-
         # self._integrate_distance()  # TODO this should not be done before determining track direction and start/finish line position
 
         # xvals = list()  # TODO rethink this
@@ -385,7 +464,7 @@ class Track:
         :type y: int or float
         :return: True or False
         """
-        if x in self.sorted_x and y in self.sorted_y:
+        if x in self._sorted_x_set and y in self._sorted_y_set:
             return True
         return False
 
@@ -407,8 +486,8 @@ class Track:
         ref_u = self.get_closest_point(ref_point)  # get the closest unique track points
         other_u = self.get_closest_point(other)
 
-        ref_i = self.sorted_points.index(ref_u)  # get the indices for the unique points
-        other_i = self.sorted_points.index(other_u)
+        ref_i = self.get_point_index(ref_u)  # get the indices for the unique points
+        other_i = self.get_point_index(other_u)
         delta_i = other_i - ref_i
 
         if delta_i < -(1 - rel_max) * len(self.sorted_points):
@@ -448,6 +527,19 @@ class Track:
             else:
                 return 0
 
+    def get_point_index(self, point):
+        """Get the index of a unique track point in the list of sorted points.
+
+        :param point: A unique track point (see .get_closest_point())
+        :type point: TrackPoint
+        :return: int
+        :raises ValueError: if the point is not a unique track point
+        """
+        try:
+            return self._sorted_index[(point.x, point.y)]
+        except KeyError:
+            raise ValueError("Point is not a unique track point")
+
     def get_closest_point(self, point):
         """Find the closest unique track point to any given point.
 
@@ -462,12 +554,28 @@ class Track:
         :type point: TrackPoint
         :return: A single TrackPoint
         """
+        distances = sqr_dists(self.sorted_x, self.sorted_y, point.x, point.y)
+
+        return self.sorted_points[int(distances.argmin())]
 
-        distances = list()
-        for track_point in self.sorted_points:
-            distances.append(track_point.get_sqr_dist(point))
+    def get_closest_points(self, xs, ys):
+        """Find the closest unique track point for multiple arbitrary points at once.
+
+        This is the batched version of .get_closest_point(). The distances between all query points and all track
+        points are calculated in a single step which is a lot faster than calling .get_closest_point() repeatedly.
+
+        :param xs: x coordinates of the query points
+        :type xs: numpy.ndarray
+        :param ys: y coordinates of the query points
+        :type ys: numpy.ndarray
+        :return: numpy.ndarray of indices into .sorted_points (one index per query point)
+        """
+        queries = np.column_stack((xs, ys))
+        if not len(queries):
+            return np.empty(0, dtype=int)
 
-        return self.sorted_points[distances.index(min(distances))]
+        track_xy = np.column_stack((self.sorted_x, self.sorted_y))
+        return distance.cdist(queries, track_xy, metric='sqeuclidean').argmin(axis=1)
 
     def get_points_between(self, point1, point2, short=True, include_ref=True):
         """Returns all unique track points between two points.
@@ -485,8 +593,8 @@ class Track:
         :return: List of TrackPoints
         """
 
-        i1 = self.sorted_points.index(point1)
-        i2 = self.sorted_points.index(point2)
+        i1 = self.get_point_index(point1)
+        i2 = self.get_point_index(point2)
 
         if abs(i1 - i2) < 0.5 * len(self.sorted_points):
             short_is_inner = True
@@ -553,12 +661,11 @@ class Track:
 
         # find the closest point in this range; only valid if the range is approximately straight
         # because we're only checking against one coordinate
-        distances = list()
-        for p in p_range:
-            distances.append(abs(p[from_coord] - val))
+        coords = np.fromiter((p[from_coord] for p in p_range), dtype='float64', count=len(p_range))
+        distances = np.abs(coords - val)
 
-        min_i = min_index(distances)
-        p_a = p_range[min_index(distances)]  # closest point
+        min_i = int(distances.argmin())
+        p_a = p_range[min_i]  # closest point
         # second closest point (with edge cases if closest point is first or last point in list)
         # This works because the points returned by get_points_between() are sorted. The second
         # closest point therefore needs to be the one before or after the closest point.
@@ -582,6 +689,37 @@ class Track:
             interp_x = p_a.x + delta_x * interp_delta_y / delta_y
             return TrackPoint(interp_x, val)
 
+    def get_closest_samples(self, drv, point, time_range_start, time_range_end):
+        """Get the two samples of a driver's position data which are closest to a point within a time range.
+
+        Only samples between the start and the end date (both exclusive) are considered.
+        :param drv: Number of the driver as a string
+        :type drv: str
+        :param point: The point you're interested in
+        :type point: TrackPoint
+        :param time_range_start: A pandas.Timestamp compatible date
+        :param time_range_end: A pandas.Timestamp compatible date
+        :return: tuple of the closest and the second closest sample as TrackPoint (with date) or None if the
+            time range contains less than two samples
+        """
+        dates, xs, ys, _ = self._get_pos_arrays(drv)
+
+        # get the range of samples between the start and the end date (both exclusive)
+        range_i64 = np.asarray(pd.to_datetime([time_range_start, time_range_end]), dtype='datetime64[ns]').view('int64')
+        i_start = np.searchsorted(dates, range_i64[0], side='right')
+        i_end = np.searchsorted(dates, range_i64[1], side='left')
+
+        if i_end - i_start < 2:
+            return None  # not enough position data in this time range
+
+        distances = sqr_dists(xs[i_start:i_end], ys[i_start:i_end], point.x, point.y)
+        i_a, i_b = np.argsort(distances, kind='stable')[:2] + i_start  # closest and second closest point
+
+        p_a = TrackPoint(xs[i_a], ys[i_a], pd.Timestamp(dates[i_a]))
+        p_b = TrackPoint(xs[i_b], ys[i_b], pd.Timestamp(dates[i_b]))
+
+        return p_a, p_b
+
     def get_time_from_pos(self, drv, point, time_range_start, time_range_end):
         """Calculate the time at which a driver was at a specific coordinate.
 
@@ -598,18 +736,11 @@ class Track:
         :param time_range_end: A pandas.Timestamp compatible date
         :return: pandas.Timestamp or None
         """
-        pos = self._pos_data[drv].query("@time_range_start < Date < @time_range_end")  # get DataFrame for driver
-
-        dists_points = list()
-        for _, row in pos.iterrows():
-            pnt = TrackPoint(row.X, row.Y, row.Date)
-            dist = point.get_sqr_dist(pnt)
-            dists_points.append((dist, pnt))
-
-        dists_points.sort(key=lambda itm: itm[0])  # sort the list by first value of each tuple (distance)
+        samples = self.get_closest_samples(drv, point, time_range_start, time_range_end)
+        if samples is None:
+            return None  # not enough position data in this time range
 
-        p_a = dists_points[0][1]  # closest point
-        p_b = dists_points[1][1]  # second closest point
+        p_a, p_b = samples
 
         if p_a.x == p_b.x and p_a.y == p_b.y:
             return None  # I have no idea how this is even possible, looks like an error in the data retrieved from the api
@@ -621,31 +752,110 @@ class Track:
 
         return date
 
-    def interpolate_pos_from_time(self, drv, query_date):
-        """Calculate the position of a driver at any given date.
+    def _get_pos_arrays(self, drv):
+        """Get the position data of a driver as arrays sorted by date.
+
+        Searching and slicing these arrays with numpy.searchsorted is a lot faster than querying the data frame.
+        The arrays are created on first access and cached afterwards.
+        Additionally, a mask is created which marks all samples that are unique track points (lazy check, see
+        .lazy_is_track_point()).
+        The coordinates are stored as float32 to halve the memory, but only if this is lossless. This is the case for
+        the integer coordinates provided by the api. Other coordinates (e.g. resampled position data) are kept as float64
+        so that results do not change.
 
         :param drv: The number of the driver as a string
         :type drv: str
-        :param query_date: The date you're interested in (pandas.Timestamp compatible)
-        :return: TrackPoint
+        :return: dates (as int64 nanoseconds), x coordinates, y coordinates, track point mask
         """
+        if drv not in self._pos_arrays:
+            drv_pos = self._pos_data[drv]
+            dates = drv_pos['Date'].values.astype('datetime64[ns]').view('int64')
+            order = np.argsort(dates, kind='stable')
+            xs = drv_pos['X'].values[order].astype('float64')
+            ys = drv_pos['Y'].values[order].astype('float64')
+            is_track_point = np.isin(xs, self.sorted_x) & np.isin(ys, self.sorted_y)
+
+            xs32 = xs.astype('float32')
+            ys32 = ys.astype('float32')
+            if np.array_equal(xs32, xs, equal_nan=True) and np.array_equal(ys32, ys, equal_nan=True):
+                xs, ys = xs32, ys32  # no precision is lost
+
+            self._pos_arrays[drv] = (dates[order], xs, ys, is_track_point)
+
+        return self._pos_arrays[drv]
+
+    def _copy_without_pos_data(self, drivers):
+        """Get a shallow copy of the track which only keeps the cached position arrays but not the position data frames.
+
+        The arrays of all given drivers are cached first. The copy can therefore be used for all position related
+        calculations for these drivers. This is the track which is sent to the solver's subprocesses, so that the
+        position data is not pickled twice (once as data frames and once as arrays).
+
+        :param drivers: Numbers of all drivers for which the copy needs position data
+        :type drivers: list
+        :return: Track
+        """
+        for drv in drivers:
+            self._get_pos_arrays(drv)
+
+        track = copy.copy(self)
+        track._pos_data = None
+        track._pos_arrays = dict(self._pos_arrays)
+        return track
+
+    def interpolate_pos_from_times(self, drv, query_dates):
+        """Calculate the positions of a driver at any number of given dates.
+
+        The position is linearly interpolated between the two samples of position data before and after each date.
+        If a date is outside of the range of position data or if one of these two samples is not a unique track point,
+        the position can not be calculated. The coordinates are NaN then.
+
+        :param drv: The number of the driver as a string
+        :type drv: str
+        :param query_dates: The dates you're interested in (array-like of pandas.Timestamp compatible dates)
+        :return: two numpy arrays of x and y coordinates respectively
+        """
+        dates, xs, ys, is_track_point = self._get_pos_arrays(drv)
+        query_i64 = np.asarray(pd.to_datetime(query_dates), dtype='datetime64[ns]').view('int64')
+
+        if len(dates) < 2:
+            return np.full(len(query_i64), np.nan), np.full(len(query_i64), np.nan)
+
+        # get the indices of the samples directly before (i0) and after (i1) each date
+        i1 = np.searchsorted(dates, query_i64, side='right')
+        # a date exactly on the last sample is valid too; it is interpolated between the last two samples
+        is_valid = ((i1 > 0) & ((i1 < len(dates)) | (query_i64 == dates[-1]))
+                    & (query_i64 != np.iinfo('int64').min))  # int64 min is NaT
+        i1 = np.clip(i1, 1, max(len(dates) - 1, 1))
+        i0 = i1 - 1
+
+        # verify both points are valid unique track points (lazy check, see .lazy_is_track_point())
+        is_valid &= is_track_point[i0] & is_track_point[i1]
+
         # use linear interpolation to determine position at arbitrary time
-        drv_pos = self._pos_data[drv]  # get DataFrame for driver
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = (query_i64 - dates[i0]) / (dates[i1] - dates[i0])
+        interp_x = xs[i0] + (xs[i1] - xs[i0]) * fraction
+        interp_y = ys[i0] + (ys[i1] - ys[i0]) * fraction
 
-        closest = drv_pos.iloc[(drv_pos['Date'] - query_date).abs().argsort()[:2]]
+        interp_x[~is_valid] = np.nan
+        interp_y[~is_valid] = np.nan
 
-        # verify both points are valid unique track points
-        if not (self.lazy_is_track_point(closest.iloc[0]['X'], closest.iloc[0]['Y']) and
-                self.lazy_is_track_point(closest.iloc[1]['X'], closest.iloc[1]['Y'])):
+        return interp_x, interp_y
 
-            return None
+    def interpolate_pos_from_time(self, drv, query_date):
+        """Calculate the position of a driver at any given date.
+
+        See .interpolate_pos_from_times() for calculating multiple positions at once.
 
-        delta_t = closest.iloc[1]['Date'] - closest.iloc[0]['Date']
-        delta_x = closest.iloc[1]['X'] - closest.iloc[0]['X']
-        delta_y = closest.iloc[1]['Y'] - closest.iloc[0]['Y']
-        interp_delta_t = query_date - closest.iloc[0]['Date']
+        :param drv: The number of the driver as a string
+        :type drv: str
+        :param query_date: The date you're interested in (pandas.Timestamp compatible)
+        :return: TrackPoint or None if the position can not be calculated
+        """
+        interp_x, interp_y = self.interpolate_pos_from_times(drv, [query_date, ])
 
-        interp_x = closest.iloc[0]['X'] + delta_x * interp_delta_t / delta_t
-        interp_y = closest.iloc[0]['Y'] + delta_y * interp_delta_t / delta_t
+        if np.isnan(interp_x[0]):
+            return None
 
-        return TrackPoint(interp_x, interp_y)
+        return TrackPoint(interp_x[0], interp_y[0])
@@ -42,7 +42,7 @@ if __name__ == '__main__':
 
     # dumps solver results as json
     json_file = open(os.path.join(OUT_DIR, 'results.json'), 'w')
-    json.dump(solver.results, json_file)
+    json.dump({name: {key: values.tolist() for key, values in res.items()} for name, res in solver.results.items()}, json_file)
     json_file.close()
 
     # visualize solver results
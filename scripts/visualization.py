@@ -51,29 +51,14 @@ def show_deviation_minima_on_track(res, track, sector_number):
 
 
 def plot_lap_time_integrity(laps_data, suffix=''):
-    drivers_series = laps_data.Driver
-    drivers = list(drivers_series.drop_duplicates())
+    time_col = 'Date' if 'Date' in laps_data.columns else 'Time'
 
-    deltas = list()
-    ref = list()  # scatter plots need an x and y value therefore ref is created by counting up
-    n = 0
+    # end of each lap minus the lap time should be the end of the previous lap of the same driver
+    lap_ends = laps_data[time_col]
+    previous_lap_ends = lap_ends.groupby(laps_data['Driver'], sort=False).shift(1)
+    deltas = (lap_ends - laps_data['LastLapTime'] - previous_lap_ends).dt.total_seconds().dropna().to_numpy()
 
-    if 'Date' in laps_data.columns:
-        for driver in drivers:
-            i_max = len(laps_data[laps_data.Driver == driver])
-            for i in range(1, i_max):
-                delta = (laps_data.iloc[i].Date - laps_data.iloc[i].LastLapTime - laps_data.iloc[i-1].Date).total_seconds()
-                deltas.append(delta)
-                ref.append(n)
-                n += 1
-    else:
-        for driver in drivers:
-            i_max = len(laps_data[laps_data.Driver == driver])
-            for i in range(1, i_max):
-                delta = (laps_data.iloc[i].Time - laps_data.iloc[i].LastLapTime - laps_data.iloc[i-1].Time).total_seconds()
-                deltas.append(delta)
-                ref.append(n)
-                n += 1
+    ref = np.arange(len(deltas))  # scatter plots need an x and y value therefore ref is created by counting up
 
     fig1 = plt.figure()
     fig1.suptitle("Lap Time Scatter {}".format(suffix))
@@ -89,7 +74,7 @@ def plot_lap_position_integrity(laps_data, track, suffix=''):
     y_vals = list()
 
     if 'Date' in laps_data.columns:
-        for _, lap in laps_data.iterrows():
+        for lap in laps_data.itertuples(index=False):
             if type(lap.Driver) != str:
                 continue
             p = track.interpolate_pos_from_time(lap.Driver, lap.Date)
@@ -102,7 +87,7 @@ def plot_lap_position_integrity(laps_data, track, suffix=''):
         # calculate the start date of the session
         some_driver = drivers[0]  # TODO to be sure this should be done with multiple drivers
         session_start_date = track._pos_data[some_driver].head(1).Date.squeeze().round('min')
-        for _, lap in laps_data.iterrows():
+        for lap in laps_data.itertuples(index=False):
             if type(lap.Driver) != str:
                 continue
             p = track.interpolate_pos_from_time(lap.Driver, session_start_date + lap.Time)
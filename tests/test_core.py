@@ -0,0 +1,70 @@
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from fastf1.core import Laps, _transform_matrix, _pit_mask, _relative_distances
+
+
+class TestMakeTrajectoryHelpers(TestCase):
+    # the helpers are compared against the loop based implementations they replaced
+
+    def test_transform_matrix(self):
+        reference_s = np.arange(0, 10, 0.667)
+        total_s = 10.2
+
+        expected = np.empty((len(reference_s), len(reference_s)))
+        for index in range(len(reference_s)):
+            rref = reference_s - reference_s[index]
+            rref[rref <= 0] = total_s + rref[rref <= 0]
+            expected[index, :] = rref
+
+        np.testing.assert_array_equal(_transform_matrix(reference_s, total_s), expected)
+
+    def test_pit_mask(self):
+        nat = pd.NaT
+        # laps of different drivers are interleaved like in the timing data
+        # driver 1: two stints; driver 2: crashes in his second lap; driver 3: no laps
+        laps = Laps({'DriverNumber': ['1', '2', '1', '2', '1', '1'],
+                     'Time': pd.to_timedelta([60, 62, 120, 124, 180, 240], 's'),
+                     'PitOutTime': pd.to_timedelta([10, 12, nat, nat, 190, nat], 's'),
+                     'PitInTime': pd.to_timedelta([nat, nat, nat, nat, 175, nat], 's')})
+        time = pd.to_timedelta(np.arange(0, 300, 5), 's')
+        status = np.where(np.arange(len(time)) % 7 == 0, 'OffTrack', 'OnTrack')
+        position = {drv: pd.DataFrame({'Time': time, 'Status': status}) for drv in ('1', '2', '3')}
+        drivers_list = np.array(list(position))
+
+        expected = np.zeros((len(time), len(drivers_list)), dtype=bool)
+        for driver_index, driver_number in enumerate(drivers_list):
+            drv_laps = laps.pick_driver_number(driver_number)
+            in_pit = True
+            times = [[], []]
+            for lap_index in drv_laps.index:
+                lap = drv_laps.loc[lap_index]
+                if not pd.isnull(lap['PitInTime']) and not in_pit:
+                    times[1].append(lap['PitInTime'])
+                    in_pit = True
+                if not pd.isnull(lap['PitOutTime']) and in_pit:
+                    times[0].append(lap['PitOutTime'])
+                    in_pit = False
+            if not in_pit:
+                times[1].append(lap['Time'])
+            times = np.transpose(np.array(times))
+            for inout in times:
+                expected[:, driver_index] |= np.logical_and(time >= inout[0], time < inout[1])
+            expected[:, driver_index] &= (position[driver_number]['Status'] == 'OnTrack').values
+
+        np.testing.assert_array_equal(_pit_mask(laps, position, drivers_list), expected)
+        self.assertTrue(expected[:, 0].any() and expected[:, 1].any())
+        self.assertFalse(expected[:, 2].any())
+
+    def test_relative_distances(self):
+        reference_s = np.arange(0, 10, 0.667)
+        t_matrix = _transform_matrix(reference_s, 10.2)
+        rng = np.random.default_rng(0)
+        dmap = rng.integers(0, len(reference_s), size=(50, 4))
+
+        for my_di in range(dmap.shape[1]):
+            expected = np.empty(np.shape(dmap))
+            for his_di in range(dmap.shape[1]):
+                expected[:, his_di] = t_matrix[dmap[:, my_di], dmap[:, his_di]]
+
+            np.testing.assert_array_equal(_relative_distances(t_matrix, dmap, my_di), expected)
@@ -1,13 +1,18 @@
-from unittest import TestCase
-from fastf1.track import TrackPoint, Track
+from unittest import TestCase, mock
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+from fastf1.track import TrackPoint, Track, _greedy_sort
+from fastf1.func import mad, mean, reject_outliers
+from fastf1.experimental.conditions import StartFinishCondition, AllSectorBordersCondition
 
 
 class TestTrackGetPointsBetween(TestCase):
-    def __init__(self, *args):
-        super().__init__(*args)
-        mod_track = Track  # Track for all get_points_between tests
-        mod_track._unsorted_points_from_pos_data = lambda *nothing: None  # disable this function
-        self.track = mod_track(dict())  # don't pass any position data for this test
+    def setUp(self):
+        # don't pass any position data for this test; extracting points from it needs to be disabled then
+        with mock.patch.object(Track, '_unsorted_points_from_pos_data'):
+            self.track = Track(dict())
         self.a = TrackPoint(1, 1)
         self.b = TrackPoint(2, 2)
         self.c = TrackPoint(3, 3)
@@ -49,3 +54,261 @@ class TestTrackGetPointsBetween(TestCase):
     def test_get_points_between_long_noref_edge(self):
         res = self.track.get_points_between(self.e, self.g, short=False, include_ref=False)
         self.assertEqual(res, [self.d, self.c, self.b, self.a])
+
+    def test_get_points_between_after_pickling(self):
+        # the point objects are different instances after pickling (e.g. when the track is loaded from a file)
+        track = pickle.loads(pickle.dumps(self.track))
+        res = track.get_points_between(track.sorted_points[1], track.sorted_points[5], short=False, include_ref=True)
+        self.assertEqual([(p.x, p.y) for p in res], [(2, 2), (3, 3), (4, 4), (5, 5), (6, 6)])
+
+
+class TestGreedySort(TestCase):
+    def test_greedy_sort(self):
+        # points on a line in random order; enough points so that the KD-tree is rebuilt multiple times
+        rng = np.random.default_rng(0)
+        order = np.concatenate(([0], rng.permutation(np.arange(1, 300))))
+        xs = order * 10.0
+        ys = np.zeros(len(xs))
+        # an outlier which is far away from all other points
+        xs = np.append(xs, 1500)
+        ys = np.append(ys, 5000)
+
+        sorted_idx, excluded_idx = _greedy_sort(xs, ys, 200)
+
+        self.assertIn(len(xs) - 1, excluded_idx)
+        self.assertEqual(len(sorted_idx) + len(excluded_idx), len(xs))
+        self.assertTrue((np.diff(xs[sorted_idx]) == 10).all())
+
+
+class TestTrackGenerate(TestCase):
+    def setUp(self):
+        # one driver driving two laps counterclockwise around a circular track with 300 unique points
+        n = 300
+        angles = np.concatenate((np.arange(2 * n), [0])) * 2 * np.pi / n
+        self.pos = pd.DataFrame({'Date': pd.Timestamp('2020-07-05 13:10:00') + pd.to_timedelta(np.arange(2 * n + 1) * 250, 'ms'),
+                                 'X': np.round(3000 * np.cos(angles)).astype(int),
+                                 'Y': np.round(3000 * np.sin(angles)).astype(int),
+                                 'Status': 'OnTrack'})
+        self.pos.loc[2 * n, 'Status'] = 'OffTrack'  # not included in the unique points
+        self.pos.loc[2 * n, ['X', 'Y']] = (0, 0)
+        self.n = n
+
+    def test_unsorted_points_from_pos_data(self):
+        track = Track({'1': self.pos, '2': self.pos.iloc[::2]})
+        self.assertEqual(len(track.unsorted_points), self.n)
+        self.assertEqual(len(track._xs), self.n)
+        self.assertNotIn((0, 0), set(zip(track._xs.tolist(), track._ys.tolist())))
+        np.testing.assert_array_equal(track._xs, [p.x for p in track.unsorted_points])
+
+    def test_generate_track(self):
+        for direction in (1, -1):  # counterclockwise and clockwise
+            with self.subTest(direction=direction):
+                pos = self.pos.copy()
+                pos['Y'] *= direction
+                track = Track({'1': pos})
+                track.generate_track()
+
+                self.assertEqual(len(track.sorted_points), self.n)
+                self.assertEqual(len(track.excluded_points), 0)
+                # consecutive points are neighbours on the circle
+                segment_lengths = np.hypot(np.diff(track.sorted_x), np.diff(track.sorted_y))
+                self.assertTrue((segment_lengths < 100).all())
+                # points are sorted in driving direction
+                indices = [track.get_point_index(track.get_closest_point(TrackPoint(x, y)))
+                           for x, y in zip(pos['X'][:self.n], pos['Y'][:self.n])]
+                self.assertTrue((np.diff(indices) % self.n == 1).all())
+
+
+class TestTrackInterpolatePos(TestCase):
+    def setUp(self):
+        self.start = pd.Timestamp('2020-07-05 13:10:00')
+        pos = pd.DataFrame({'Date': self.start + pd.to_timedelta([0, 1, 2, 3], 's'),
+                            'X': [0, 10, 20, 30],
+                            'Y': [0, 0, 5, 5],
+                            'Status': 'OnTrack'})
+        self.track = Track({'1': pos})
+        # (30, 5) is intentionally not a unique track point
+        self.track.sorted_points = [TrackPoint(0, 0), TrackPoint(10, 0), TrackPoint(20, 5)]
+
+    def test_interpolate_pos_from_time(self):
+        p = self.track.interpolate_pos_from_time('1', self.start + pd.Timedelta(500, 'ms'))
+        self.assertEqual((p.x, p.y), (5, 0))
+
+    def test_interpolate_pos_from_time_invalid(self):
+        # outside of the range of position data
+        self.assertIsNone(self.track.interpolate_pos_from_time('1', self.start - pd.Timedelta(1, 's')))
+        # second point is not a unique track point
+        self.assertIsNone(self.track.interpolate_pos_from_time('1', self.start + pd.Timedelta(2500, 'ms')))
+
+    def test_interpolate_pos_from_times_on_samples(self):
+        # dates exactly on the first and last sample are within the range of position data
+        xs, ys = self.track.interpolate_pos_from_times('1', self.start + pd.to_timedelta([0, 1, 2], 's'))
+        np.testing.assert_array_equal(xs, [0, 10, np.nan])  # (30, 5) is not a unique track point
+        track = Track({'1': self.track._pos_data['1'].iloc[:3]})
+        track.sorted_points = self.track.sorted_points
+        xs, ys = track.interpolate_pos_from_times('1', self.start + pd.to_timedelta([0, 2], 's'))
+        np.testing.assert_array_equal(xs, [0, 20])
+        np.testing.assert_array_equal(ys, [0, 5])
+
+    def test_interpolate_pos_from_times(self):
+        dates = self.start + pd.to_timedelta([250, 1500, 2500, 5000], 'ms')
+        xs, ys = self.track.interpolate_pos_from_times('1', dates)
+        np.testing.assert_array_equal(xs, [2.5, 15, np.nan, np.nan])
+        np.testing.assert_array_equal(ys, [0, 2.5, np.nan, np.nan])
+
+    def test_interpolate_pos_from_times_non_integer_coordinates(self):
+        pos = pd.DataFrame({'Date': self.start + pd.to_timedelta([0, 1, 2], 's'),
+                            'X': [0.1, 10.1, 20.1],
+                            'Y': [0.1, 0.1, 5.1],
+                            'Status': 'OnTrack'})
+        track = Track({'1': pos})
+        track.sorted_points = [TrackPoint(0.1, 0.1), TrackPoint(10.1, 0.1), TrackPoint(20.1, 5.1)]
+        xs, ys = track.interpolate_pos_from_times('1', self.start + pd.to_timedelta([500, 1500], 'ms'))
+        np.testing.assert_allclose(xs, [5.1, 15.1], rtol=1e-12)
+        np.testing.assert_allclose(ys, [0.1, 2.6], rtol=1e-12)
+        # these coordinates can not be stored as float32 without losing precision
+        self.assertEqual(track._get_pos_arrays('1')[1].dtype, np.float64)
+        # integer coordinates can
+        self.assertEqual(self.track._get_pos_arrays('1')[1].dtype, np.float32)
+
+    def test_interpolate_pos_after_changing_sorted_points(self):
+        self.track.interpolate_pos_from_times('1', [self.start])  # fill the cache
+        self.track.sorted_points = [TrackPoint(0, 0), TrackPoint(10, 0), TrackPoint(20, 5), TrackPoint(30, 5)]
+        xs, ys = self.track.interpolate_pos_from_times('1', self.start + pd.to_timedelta([2500], 'ms'))
+        np.testing.assert_array_equal(xs, [25])
+        np.testing.assert_array_equal(ys, [5])
+
+    def test_get_time_from_pos(self):
+        date = self.track.get_time_from_pos('1', TrackPoint(15, 2.5), self.start, self.start + pd.Timedelta(3, 's'))
+        self.assertEqual(date, self.start + pd.Timedelta(1500, 'ms'))
+
+    def test_get_time_from_pos_not_enough_data(self):
+        date = self.track.get_time_from_pos('1', TrackPoint(15, 2.5), self.start, self.start + pd.Timedelta(2, 's'))
+        self.assertIsNone(date)
+
+    def test_copy_without_pos_data(self):
+        track = pickle.loads(pickle.dumps(self.track._copy_without_pos_data(['1'])))
+        self.assertIsNone(track._pos_data)
+        self.assertIsNotNone(self.track._pos_data)
+        xs, ys = track.interpolate_pos_from_times('1', self.start + pd.to_timedelta([250, 1500], 'ms'))
+        np.testing.assert_array_equal(xs, [2.5, 15])
+        np.testing.assert_array_equal(ys, [0, 2.5])
+
+    def test_get_closest_points(self):
+        indices = self.track.get_closest_points(np.array([1, 19, 9]), np.array([1, 4, -2]))
+        np.testing.assert_array_equal(indices, [0, 2, 1])
+        self.assertEqual(len(self.track.get_closest_points(np.empty(0), np.empty(0))), 0)
+
+    def test_integrate_distance(self):
+        self.track._integrate_distance()
+        np.testing.assert_allclose(self.track.distances, [0, 10, 10 + np.hypot(10, 5)])
+        self.assertEqual(self.track.distances_normalized[-1], 1)
+
+
+class TestConditions(TestCase):
+    def setUp(self):
+        # same position data and track as in TestTrackInterpolatePos
+        self.start = pd.Timestamp('2020-07-05 13:10:00')
+        pos = pd.DataFrame({'Date': self.start + pd.to_timedelta([0, 1, 2, 3], 's'),
+                            'X': [0, 10, 20, 30],
+                            'Y': [0, 0, 5, 5],
+                            'Status': 'OnTrack'})
+        self.track = Track({'1': pos})
+        self.track.sorted_points = [TrackPoint(0, 0), TrackPoint(10, 0), TrackPoint(20, 5)]
+
+    def _make_condition(self, condition_cls):
+        # test date for TrackPoint(15, 2.5) is start + 1.5s for the first two laps
+        # second lap: start of the lap is outside of the range of position data
+        # third lap: no position data around the end of the lap, therefore no test date (NaT)
+        laps = pd.DataFrame({'Time': pd.to_timedelta([2, 2, 100], 's'),
+                             'LastLapTime': pd.to_timedelta([1, 10, 1], 's'),
+                             'Sector3Time': pd.to_timedelta([500, 500, 500], 'ms'),
+                             'Sector2Time': pd.to_timedelta([250, 250, 250], 'ms')})
+        condition = condition_cls()
+        condition.set_data({'track': self.track, 'laps_by_drv': {'1': laps}, 'session_start_date': self.start})
+        return condition
+
+    def test_start_finish_condition_for_driver(self):
+        condition = self._make_condition(StartFinishCondition)
+        res = condition.for_driver('1', TrackPoint(15, 2.5))
+        np.testing.assert_allclose(res['x'], [5], atol=1e-6)
+        np.testing.assert_allclose(res['y'], [0], atol=1e-6)
+
+    def test_all_sector_borders_condition_for_driver(self):
+        condition = self._make_condition(AllSectorBordersCondition)
+        res = condition.for_driver('1', TrackPoint(15, 2.5))
+        for key, expected in (('x1', [5]), ('x2', [7.5]), ('x3', [10]), ('y1', [0]), ('y2', [0]), ('y3', [0])):
+            np.testing.assert_allclose(res[key], expected, atol=1e-6)
+
+    def test_generate_results_empty(self):
+        condition = self._make_condition(StartFinishCondition)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')  # no 'Mean of empty slice' warning
+            res = condition.generate_results({'x': np.empty(0), 'y': np.empty(0)}, TrackPoint(15, 2.5))
+        self.assertTrue(np.isnan(res['mean_x']))
+        self.assertTrue(np.isnan(res['mad_x']))
+
+
+class _OldPickle:
+    """Pickles like an instance of cls with a plain __dict__ (this is how older versions pickled their objects)."""
+    def __init__(self, cls, state):
+        self.cls = cls
+        self.state = state
+
+    def __reduce__(self):
+        return object.__new__, (self.cls, ), self.state
+
+
+class TestPickleCompatibility(TestCase):
+    def test_load_old_track_point(self):
+        date = pd.Timestamp('2020-07-05 13:10:00')
+        point = pickle.loads(pickle.dumps(_OldPickle(TrackPoint, {'x': 1, 'y': 2, 'date': date})))
+        self.assertIsInstance(point, TrackPoint)
+        self.assertEqual((point.x, point.y, point.date), (1, 2, date))
+
+    def test_load_old_track(self):
+        start = pd.Timestamp('2020-07-05 13:10:00')
+        pos = pd.DataFrame({'Date': start + pd.to_timedelta([0, 1, 2], 's'),
+                            'X': [0, 10, 20],
+                            'Y': [0, 0, 5],
+                            'Status': 'OnTrack'})
+        points = [_OldPickle(TrackPoint, {'x': x, 'y': y, 'date': None}) for x, y in ((0, 0), (10, 0), (20, 5))]
+        state = {'_pos_data': {'1': pos}, 'unsorted_points': points, 'sorted_points': points, 'excluded_points': [],
+                 'sorted_x': [0, 10, 20], 'sorted_y': [0, 0, 5], 'finish_line': None,
+                 'distances': [0, 10, 10 + np.hypot(10, 5)], 'distances_normalized': [], 'track': None,
+                 '_next_point': None, '_vis_freq': 0, '_vis_counter': 0, '_fig': None}
+        track = pickle.loads(pickle.dumps(_OldPickle(Track, state)))
+
+        self.assertEqual(len(track.sorted_points), 3)
+        np.testing.assert_array_equal(track.sorted_x, [0, 10, 20])
+        self.assertEqual(track.get_point_index(track.sorted_points[2]), 2)
+        self.assertTrue(track.lazy_is_track_point(10, 0))
+        xs, ys = track.interpolate_pos_from_times('1', start + pd.to_timedelta([500, 1500], 'ms'))
+        np.testing.assert_array_equal(xs, [5, 15])
+        np.testing.assert_array_equal(ys, [0, 2.5])
+
+    def test_track_point_round_trip(self):
+        point = pickle.loads(pickle.dumps(TrackPoint(1.5, 2)))
+        self.assertEqual((point.x, point.y, point.date), (1.5, 2, None))
+
+
+class TestFunc(TestCase):
+    def test_mean(self):
+        self.assertEqual(mean([1, 2, 3, 6]), 3)
+        self.assertTrue(np.isnan(mean([])))
+
+    def test_mad(self):
+        self.assertEqual(mad([1, 2, 3, 6]), 1.5)
+        self.assertTrue(np.isnan(mad([])))
+
+    def test_reject_outliers(self):
+        data, secondary = reject_outliers(np.array([1., 2., 3., 100.]), np.array([10, 20, 30, 40]), m=5)
+        np.testing.assert_array_equal(data, [1, 2, 3])
+        np.testing.assert_array_equal(secondary, [10, 20, 30])
+
+    def test_reject_outliers_no_deviation(self):
+        # all values are kept and the arrays keep their shape if the median deviation is zero
+        data, secondary = reject_outliers(np.ones(3), np.arange(3))
+        np.testing.assert_array_equal(data, [1, 1, 1])
+        np.testing.assert_array_equal(secondary, [0, 1, 2])
+        self.assertEqual(data.shape, (3, ))